@@ -1,10 +1,13 @@
 import os
+import sys
+import asyncio
 import argparse
 import logging
 from typing import List, Dict, Any
 
 from dotenv import load_dotenv
 from pinecone_client.client import VectorDBClient
+from rag_api.answer_store import AnswerStore, QueryLog, store_version
 from scraper_client.client import ScraperClient  # Custom client for interacting with Apify
 
 # Configuration
@@ -40,6 +43,81 @@ def start_apify_scraper() -> None:
     # Log the number of exercises obtained
     logging.info(f'SCRAPER JOB ENDED, {len(exercises)} TOTAL EXERCISES OBTAINED')
 
+def _positive_int(value: str) -> int:
+    """Argparse type for options that only make sense with a positive count"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'expected a positive integer, got {value}')
+    return number
+
+def warm_answer_cache(top_n: int) -> bool:
+    """Pre-generates answers for the most frequent logged questions and replaces the answer store with them.
+
+    The existing store is kept untouched if nothing was generated or too many answers failed
+    (more than ANSWER_STORE_MAX_FAILURE_RATIO of them, 0.5 by default).
+
+    Args:
+        top_n (int): Number of the most popular question/filters pairs to pre-generate
+
+    Returns:
+        bool: Whether the answer store was replaced
+    """
+    # Imported here since the RAG client pulls its prompt from the LangChain hub on import
+    from fastapi.encoders import jsonable_encoder
+    from rag_api.client import RAGPipeline
+
+    query_log = QueryLog()
+    if not query_log.log_files():
+        logging.error(
+            f'NO QUERY LOG FOUND AT {query_log.path.resolve()}! The log lives in the api container, '
+            'run this command there: docker compose exec api python main.py --warm-answer-cache N'
+        )
+        return False
+
+    top_queries = query_log.top_queries(top_n)
+    logging.info(f'WARMING ANSWER CACHE FOR {len(top_queries)} POPULAR QUESTIONS...')
+
+    rag_pipe = RAGPipeline(
+        llm=os.environ["OLLAMA_MODEL"],
+        vector_db_index=os.environ["PC_INDEX_NAME"],
+        namespace=os.environ["PC_NAMESPACE"]
+    )
+    # Start from an empty store so the saved file holds exactly the current top N for the current model and index
+    answer_store = AnswerStore(version=store_version(
+        llm=os.environ["OLLAMA_MODEL"],
+        vector_db_index=os.environ["PC_INDEX_NAME"],
+        namespace=os.environ["PC_NAMESPACE"]
+    ))
+
+    async def generate() -> int:
+        failures = 0
+        for question, filters, count in top_queries:
+            try:
+                result = await rag_pipe.run_graph(query=question, filters=filters)
+            except Exception as _e:
+                logging.error(f'Failed to pre-generate an answer for "{question}":\n{_e}')
+                failures += 1
+                continue
+            answer_store.put(question, filters, jsonable_encoder({
+                "context": result["context"],
+                "answer": result["answer"]
+            }))
+            logging.info(f'Pre-generated answer for "{question}" ({count} requests)')
+        return failures
+
+    failures = asyncio.run(generate())
+    max_failure_ratio = float(os.environ.get("ANSWER_STORE_MAX_FAILURE_RATIO", "0.5"))
+    if not answer_store.answers or failures > max_failure_ratio * len(top_queries):
+        logging.error(
+            f'Answer cache warming failed for {failures} of {len(top_queries)} questions, '
+            f'keeping the existing answer store at {answer_store.path}'
+        )
+        return False
+
+    answer_store.save()
+    logging.info(f'Answer store saved with {len(answer_store.answers)} answers ({failures} failed)')
+    return True
+
 def main() -> None:
     """Parses command-line arguments and starts the scraping task if the corresponding flag is set."""
     parser = argparse.ArgumentParser(
@@ -55,6 +133,15 @@ def main() -> None:
         '--load-excercises-metadata',
         help='Starts Apify exercise scraping task'
     )
+    parser.add_argument(
+        '--warm-answer-cache',
+        type=_positive_int,
+        metavar='TOP_N',
+        help=(
+            'Pre-generates answers for the TOP_N most frequent logged questions. '
+            'Run it where the API query log lives, e.g. docker compose exec api python main.py --warm-answer-cache 50'
+        )
+    )
     
     # Parse command-line arguments
     args = parser.parse_args()
@@ -67,5 +154,9 @@ def main() -> None:
     if args.load_excercises_metadata:
         load_excercise_metadata(args.load_excercises_metadata)
 
+    # Pre-generate answers for popular questions
+    if args.warm_answer_cache and not warm_answer_cache(args.warm_answer_cache):
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
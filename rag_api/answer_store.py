@@ -0,0 +1,236 @@
+import os
+import re
+import json
+import time
+import queue
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Any
+
+QUERY_LOG_PATH = os.environ.get("QUERY_LOG_PATH", "data/query_log.jsonl")
+ANSWER_STORE_PATH = os.environ.get("ANSWER_STORE_PATH", "data/answer_store.json")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases the question, collapses whitespace and drops trailing punctuation"""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+def normalize_filters(filters: Optional[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """Sorts filter keys and values and drops empty filter groups"""
+    return {k: sorted(set(v)) for k, v in sorted((filters or {}).items()) if v}
+
+def answer_key(question: str, filters: Optional[Dict[str, List[str]]]) -> str:
+    """Builds a stable key for a question/filters pair"""
+    return json.dumps(
+        [normalize_question(question), normalize_filters(filters)],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+def store_version(llm: str, vector_db_index: str, namespace: str) -> Dict[str, str]:
+    """Identifies the model and vector index the stored answers were generated with"""
+    return {"model": llm, "index": vector_db_index, "namespace": namespace}
+
+
+class QueryLog:
+    """Appends compact JSON records of user queries to a size-rotated local log.
+
+    Records are handed to a background thread through a queue, so writes and rotations
+    never block the caller's event loop.
+    """
+
+    def __init__(self, path: str = QUERY_LOG_PATH, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self.logger = logging.getLogger(f"gymwise.query_log.{self.path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        """Starts the background writer, must be called before recording"""
+        if self.listener:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        file_handler = RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+
+        records: queue.Queue = queue.Queue(-1)
+        self.logger.handlers = [QueueHandler(records)]
+        self.listener = QueueListener(records, file_handler)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flushes the pending records and stops the background writer"""
+        if self.listener:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+        self.logger.handlers = []
+
+    def record(
+        self,
+        question: str,
+        filters: Optional[Dict[str, List[str]]],
+        timings: Dict[str, float],
+        cache: str
+    ) -> None:
+        """Queues a single query record
+
+        Args:
+            question (str): A question from a user,
+            filters (Optional[Dict[str, List[str]]]): Equipment and muscle group filtering,
+            timings (Dict[str, float]): Latency per pipeline stage in milliseconds,
+            cache (str): Answer store outcome, "hit" or "miss"
+        """
+        try:
+            self.logger.info(json.dumps({
+                "q": normalize_question(question),
+                "raw": question.strip(),
+                "f": normalize_filters(filters),
+                "ms": {k: round(v, 1) for k, v in timings.items()},
+                "cache": cache
+            }, ensure_ascii=False, separators=(",", ":")))
+        except Exception as _e:
+            logging.error(f'An error occured during query logging:\n{_e}')
+
+    def log_files(self) -> List[Path]:
+        """Returns the current and rotated log files, oldest first"""
+        return sorted(
+            self.path.parent.glob(self.path.name + "*"),
+            key=lambda p: -int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0
+        )
+
+    def top_queries(self, top_n: int) -> List[Tuple[str, Dict[str, List[str]], int]]:
+        """Mines the current and rotated logs for the most frequent question/filters pairs
+
+        Args:
+            top_n (int): Number of pairs to return
+
+        Returns:
+            List[Tuple[str, Dict[str, List[str]], int]]: First original phrasing seen for the pair,
+            its filters and number of occurrences
+        """
+        counts: Counter = Counter()
+        representatives: Dict[str, Tuple[str, Dict[str, List[str]]]] = {}
+
+        # Oldest rotated file first, so the representative is the earliest phrasing still on disk
+        for log_file in self.log_files():
+            with open(log_file, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        rec = json.loads(line)
+                        if not isinstance(rec, dict) or not isinstance(rec.get("f", {}), dict):
+                            continue
+                        question = rec.get("raw") or rec["q"]
+                        if not isinstance(question, str):
+                            continue
+                        key = answer_key(question, rec.get("f"))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue
+                    counts[key] += 1
+                    representatives.setdefault(key, (question, normalize_filters(rec.get("f"))))
+
+        return [
+            (*representatives[key], n)
+            for key, n in counts.most_common(top_n)
+        ]
+
+
+class AnswerStore:
+    """Persistent key-value store of pre-generated answers, kept in memory by the API.
+
+    The file carries a version header (model, index, namespace); a store generated for a
+    different version is ignored on load. The file also records when it was generated, and
+    with `max_age` set, answers older than that are dropped, so a re-ingested index isn't
+    shadowed by stale answers forever.
+    """
+
+    def __init__(self, version: Dict[str, str], path: str = ANSWER_STORE_PATH, max_age: Optional[float] = None):
+        self.path = Path(path)
+        self.version = version
+        self.max_age = max_age
+        self.answers: Dict[str, Dict[str, Any]] = {}
+        self.generated_at: Optional[float] = None
+        self._mtime: Optional[float] = None
+
+    def _is_expired(self, generated_at: Any) -> bool:
+        if self.max_age is None:
+            return False
+        if not isinstance(generated_at, (int, float)):
+            return True
+        return time.time() - generated_at > self.max_age
+
+    def reload_if_changed(self) -> None:
+        """Reloads the store from disk if the file was rewritten since the last load, drops expired answers"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = self._mtime
+        if mtime == self._mtime:
+            if self.answers and self._is_expired(self.generated_at):
+                logging.warning(f'Answer store {self.path} is older than {self.max_age}s, serving from the pipeline until it is re-warmed')
+                self.answers = {}
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except Exception as _e:
+            logging.error(f'An error occured during answer store loading:\n{_e}')
+            return
+        self._mtime = mtime
+
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            logging.warning(f'Ignoring answer store {self.path}: generated for {data.get("version") if isinstance(data, dict) else None}, expected {self.version}')
+            self.answers = {}
+            return
+
+        if self._is_expired(data.get("generated_at")):
+            logging.warning(f'Ignoring answer store {self.path}: older than {self.max_age}s')
+            self.answers = {}
+            return
+
+        # Swap the whole dict so concurrent readers never see a partially loaded store
+        self.answers = data.get("answers", {})
+        self.generated_at = data.get("generated_at")
+        logging.info(f'Loaded {len(self.answers)} pre-generated answers from {self.path}')
+
+    async def watch(self, interval: float) -> None:
+        """Periodically reloads the store off the event loop"""
+        while True:
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as _e:
+                logging.error(f'An error occured during answer store reloading:\n{_e}')
+            await asyncio.sleep(interval)
+
+    def get(self, question: str, filters: Optional[Dict[str, List[str]]]) -> Optional[Dict[str, Any]]:
+        """Returns a pre-generated response for the question/filters pair, if there is one"""
+        return self.answers.get(answer_key(question, filters))
+
+    def put(self, question: str, filters: Optional[Dict[str, List[str]]], response: Dict[str, Any]) -> None:
+        self.answers[answer_key(question, filters)] = response
+
+    def save(self) -> None:
+        """Atomically writes the store to disk so the API never reads a half-written file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.generated_at = time.time()
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": self.version, "generated_at": self.generated_at, "answers": self.answers},
+                file,
+                ensure_ascii=False
+            )
+        os.replace(tmp_path, self.path)
+
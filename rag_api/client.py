@@ -1,4 +1,5 @@
 import os
+import time
 from typing import List, Optional, Dict
 from typing_extensions import TypedDict
 
@@ -19,6 +20,7 @@ class State(TypedDict):
     context: List[Document]
     answer: str
     filters: Optional[Dict[str, List[str]]]
+    timings: Dict[str, float]
 
 class RAGPipeline:
     """Initializes the RAG pipeline, supports running the full pipeline with retrieval and LLM call"""
@@ -33,6 +35,7 @@ class RAGPipeline:
         self.graph = graph_builder.compile()
 
     async def _retrieve(self, state: State):
+        started = time.perf_counter()
         raw = await self.vector_db.query_dense_index(
             query=state["question"],
             filters=state.get("filters")
@@ -53,9 +56,13 @@ class RAGPipeline:
             )
             for rec in hits
         ]
-        return {"context": docs}
+        return {
+            "context": docs,
+            "timings": {**state.get("timings", {}), "retrieve": (time.perf_counter() - started) * 1000}
+        }
 
     async def _generate(self, state: State):
+        started = time.perf_counter()
         docs_content = "\n\n".join(d.page_content for d in state["context"])
         messages = [
             {
@@ -80,7 +87,10 @@ class RAGPipeline:
         ]
 
         answer = await self.llm_model.ainvoke(messages)
-        return {"answer": answer}
+        return {
+            "answer": answer,
+            "timings": {**state.get("timings", {}), "generate": (time.perf_counter() - started) * 1000}
+        }
     
     async def run_graph(self, query: str, filters: Optional[Dict[str, List[str]]]):
         """Runs the full LangChain Graph which triggers retrieval, and LLM answer generation
@@ -88,11 +98,15 @@ class RAGPipeline:
         Args:
             query (str): A question from a user,
             filters (Optional[Dict[str, List[str]]]): Equipment and muscle group filtering
+
+        Returns:
+            State: Final graph state, including per-stage latency in milliseconds under "timings"
         """
 
         return await self.graph.ainvoke({
             "question": query,
-            "filters": filters if filters else {}
+            "filters": filters if filters else {},
+            "timings": {}
         })
 
 
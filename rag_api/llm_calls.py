@@ -6,11 +6,30 @@ and vector database access. It provides:
     - GET "/" : Returns information about the loaded LLM model and vector database.
     - POST "/ask_excercise_question" : Accepts a question with optional filters, queries the RAG pipeline,
       and returns the retrieved context along with the generated answer.
+    - POST "/ask_excercise_questions/batch" : Accepts a list of questions, runs the unique ones concurrently
+      and streams the results back as NDJSON in completion order, tagged with the input index.
+
+Answers pre-generated by `main.py --warm-answer-cache` are served by "/ask_excercise_question" from the
+answer store without running the pipeline, and every question it answers is appended to the rotating
+query log. The batch endpoint always runs the pipeline and is not logged, so evaluation runs measure the
+real pipeline and don't skew the popular questions.
+
+The answer store records when it was generated and is dropped once it is older than
+ANSWER_STORE_MAX_AGE_SECONDS. Re-ingesting exercises with `main.py --load-excercises-metadata` does not
+touch the store, so until the next warm run (or until the store expires) head queries keep getting
+answers built from the previous vectors. Re-run `--warm-answer-cache` after an ingest to refresh them.
 
 Environment variables:
     OLLAMA_MODEL   -- Name or identifier of the LLM model to use.
     PC_INDEX_NAME  -- Name of the vector database index.
     PC_NAMESPACE   -- Namespace within the vector database.
+    BATCH_MAX_CONCURRENCY -- Max number of batch pipeline runs in flight across all batch requests (default: 4).
+    BATCH_MAX_ITEMS       -- Max number of items in a single batch request (default: 256).
+    QUERY_LOG_PATH        -- Path of the rotating query log (default: data/query_log.jsonl).
+    ANSWER_STORE_PATH     -- Path of the pre-generated answer store (default: data/answer_store.json).
+    ANSWER_STORE_RELOAD_SECONDS -- How often the answer store file is checked for changes (default: 60).
+    ANSWER_STORE_MAX_AGE_SECONDS -- Max age of the answer store before it stops being served (default: 172800, two days,
+                                    so a single failed nightly warm run doesn't send head traffic back to Ollama).
 
 Dependencies:
     - rag_api.client.RAGPipeline : Handles the RAG execution logic.
@@ -18,25 +37,114 @@ Dependencies:
 """
 
 import os
-from typing import List, Dict
-from pydantic import BaseModel
+import json
+import logging
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Dict, Tuple, Any, AsyncIterator
+from pydantic import BaseModel, Field
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 from rag_api.client import RAGPipeline
+from rag_api.answer_store import AnswerStore, QueryLog, store_version
 
-app = FastAPI()
 rag_pipe = RAGPipeline(
     llm=os.environ["OLLAMA_MODEL"],
     vector_db_index=os.environ["PC_INDEX_NAME"],
     namespace=os.environ["PC_NAMESPACE"]
 )
+answer_store = AnswerStore(version=store_version(
+    llm=os.environ["OLLAMA_MODEL"],
+    vector_db_index=os.environ["PC_INDEX_NAME"],
+    namespace=os.environ["PC_NAMESPACE"]
+), max_age=float(os.environ.get("ANSWER_STORE_MAX_AGE_SECONDS", "172800")))
+query_log = QueryLog()
+ANSWER_STORE_RELOAD_SECONDS = float(os.environ.get("ANSWER_STORE_RELOAD_SECONDS", "60"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "256"))
+
+# Shared by all batch requests so concurrent batches can't multiply the load on Ollama
+batch_semaphore = asyncio.Semaphore(max(BATCH_MAX_CONCURRENCY, 1))
 
 class Query(BaseModel):
     question_text: str
     filters: Dict[str, List[str]]
 
+class BatchQuery(BaseModel):
+    items: List[Query] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Loads the answer store, then keeps reloading it and writing the query log off the request path"""
+    await asyncio.to_thread(answer_store.reload_if_changed)
+    query_log.start()
+    watcher = asyncio.create_task(answer_store.watch(ANSWER_STORE_RELOAD_SECONDS))
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        query_log.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def _answer(query: Query) -> Dict[str, Any]:
+    """Serves the question from the answer store if possible, otherwise runs the RAG pipeline"""
+    started = time.perf_counter()
+    response = answer_store.get(query.question_text, query.filters)
+    if response is not None:
+        timings = {"total": (time.perf_counter() - started) * 1000}
+        cache = "hit"
+    else:
+        result = await rag_pipe.run_graph(query=query.question_text, filters=query.filters)
+        response = {"context": result["context"], "answer": result["answer"]}
+        timings = {**result.get("timings", {}), "total": (time.perf_counter() - started) * 1000}
+        cache = "miss"
+
+    query_log.record(query.question_text, query.filters, timings=timings, cache=cache)
+    return response
+
+def _query_key(query: Query) -> Tuple[str, Tuple[Tuple[str, Tuple[str, ...]], ...]]:
+    """Builds a hashable key so identical questions with identical filters are only run once"""
+    return (
+        query.question_text.strip(),
+        tuple(sorted((k, tuple(sorted(v))) for k, v in query.filters.items() if v))
+    )
+
+async def _stream_batch(items: List[Query]) -> AsyncIterator[str]:
+    """Runs the unique batch items with bounded concurrency and yields NDJSON lines as they complete"""
+    indexes_by_key: Dict[tuple, List[int]] = {}
+    for i, item in enumerate(items):
+        indexes_by_key.setdefault(_query_key(item), []).append(i)
+
+    async def run_one(indexes: List[int]):
+        query = items[indexes[0]]
+        async with batch_semaphore:
+            try:
+                result = await rag_pipe.run_graph(query=query.question_text, filters=query.filters)
+                payload = {"response": {"context": result["context"], "answer": result["answer"]}}
+            except Exception as _e:
+                logging.error(f'An error occured during batch item processing:\n{_e}')
+                payload = {"error": "Failed to answer this question"}
+        return indexes, payload
+
+    tasks = [asyncio.create_task(run_one(idx)) for idx in indexes_by_key.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indexes, payload = await next_done
+            for i in indexes:
+                yield json.dumps(jsonable_encoder({"index": i, **payload}), ensure_ascii=False) + "\n"
+    finally:
+        # Client disconnected mid-stream: don't keep burning LLM time on results nobody reads
+        for task in tasks:
+            task.cancel()
+
 
 @app.get("/")
 async def read_root():
@@ -45,14 +153,14 @@ async def read_root():
 
 @app.post("/ask_excercise_question")
 async def ask_excercise_question(query: Query):
-    result = await rag_pipe.run_graph(query=query.question_text, filters=query.filters)
     return {
-        "response": {
-            "context": result["context"],
-            "answer": result["answer"]
-        }
+        "response": await _answer(query)
     }
 
+@app.post("/ask_excercise_questions/batch")
+async def ask_excercise_questions_batch(batch: BatchQuery):
+    return StreamingResponse(_stream_batch(batch.items), media_type="application/x-ndjson")
+
 
 if __name__ == "__main__":
     uvicorn.run(app, host='0.0.0.0', port=8000)